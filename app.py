@@ -1,9 +1,37 @@
+import asyncio
+from collections import OrderedDict
+import hashlib
+import io
+import json
+import os
+from operator import attrgetter
+import re
+import tempfile
+import textwrap
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import google.generativeai as genai
+from google.generativeai import client as genai_client
+from google.api_core.exceptions import ResourceExhausted
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
 from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled, VideoUnavailable
-from urllib.parse import urlparse, parse_qs
 import yt_dlp
 
+# Optional semantic summary cache; the app works without these packages
+try:
+    import faiss
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+    SEMANTIC_CACHE_AVAILABLE = True
+except ImportError:
+    SEMANTIC_CACHE_AVAILABLE = False
+
+# Inline caption tags (<c>, <00:00:01.000>, ...), compiled once instead of on every transcript
+_VTT_TAG_RE = re.compile(r'<[^>]+>')
+
 # Skip .env file completely and ask for API key directly
 st.sidebar.header("🔑 API Configuration")
 api_key = st.sidebar.text_input("Enter your Google API Key:", type="password", help="Get your API key from https://makersuite.google.com/app/apikey")
@@ -13,13 +41,71 @@ if not api_key:
     st.info("💡 Get your free API key from: https://makersuite.google.com/app/apikey")
     st.stop()
 
+# genai.configure() replaces one process-wide default client, and a GenerativeModel
+# picks up whatever default is current on its first call. So each cached model is
+# bound to a client for its own key right away, under a lock so concurrent sessions
+# with different keys can't swap the default in between.
+@st.cache_resource
+def _configure_lock():
+    return threading.Lock()
+
+# One model handle per API key, shared across reruns and sessions using that key.
+# max_entries keeps typo'd or stale keys from piling up gRPC clients forever.
+@st.cache_resource(max_entries=8)
+def _gemini_model(api_key):
+    with _configure_lock():
+        genai.configure(api_key=api_key)
+        model = genai.GenerativeModel("gemini-2.0-flash-001")
+        # Private slot: GenerativeModel fills _client lazily from the default client on
+        # first use (generative_models.py). Setting it here pins that SDK behaviour,
+        # hence the upper bound on google-generativeai in requirements.txt.
+        model._client = genai_client.get_default_generative_client()
+    return model
+
 try:
-    genai.configure(api_key=api_key)
+    _gemini_model(api_key)
     st.sidebar.success(" API key configured!")
 except Exception as e:
     st.sidebar.error(f" Invalid API key: {str(e)}")
     st.stop()
 
+# Worker threads for the blocking transcript libraries, one pool per backend, shared
+# across reruns and sessions. Dedicated pools (rather than asyncio's default executor)
+# let asyncio.run() return as soon as one backend wins instead of waiting for the
+# cancelled one. Cancelling does not stop the losing thread, though: it holds its
+# worker until the library call returns. So each backend gets its own pool, and a slow
+# yt-dlp loser never delays an API fetch. The pools are sized for every fetch that can
+# run at once: the _pipeline_pool jobs plus a batch's concurrent transcript fetches.
+_FETCH_WORKERS = 16
+
+@st.cache_resource
+def _ytdlp_pool():
+    return ThreadPoolExecutor(max_workers=_FETCH_WORKERS, thread_name_prefix="ytdlp")
+
+@st.cache_resource
+def _api_pool():
+    return ThreadPoolExecutor(max_workers=_FETCH_WORKERS, thread_name_prefix="transcript-api")
+
+async def _run_blocking(pool, func, *args):
+    return await asyncio.get_running_loop().run_in_executor(pool, func, *args)
+
+# Threads that run a whole fetch pipeline off the script thread so the page can show
+# progress. Kept apart from the backend pools because these jobs wait on them, and a
+# shared pool could fill up with waiting pipelines and deadlock.
+@st.cache_resource
+def _pipeline_pool():
+    return ThreadPoolExecutor(max_workers=4)
+
+def _submit_pipeline(func, *args):
+    ctx = get_script_run_ctx()
+    
+    def run():
+        # Give the thread the script context so st caches work inside func
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return func(*args)
+    
+    return _pipeline_pool().submit(run)
+
 # Prompt template for Gemini
 prompt = """
 You are a YouTube video summarizer. You will be taking the transcript text
@@ -27,31 +113,35 @@ and summarizing the entire video and providing the important summary in points
 within 250 words. Please provide the summary of the text given here:  
 """
 
+# Long transcripts are summarized map-reduce style: each chunk gets its own share of
+# the word budget, then the partial summaries are merged into the final notes
+_CHUNK_CHARS = 8000
+_SUMMARY_WORDS = 250
+_MAX_CONCURRENCY = max(int(os.getenv('GEMINI_MAX_CONCURRENCY', '8')), 1)  # whole process
+_GENERATION_CONFIG = {"candidate_count": 1}
+
+chunk_prompt = """
+You are a YouTube video summarizer. You will be given one part of a longer video
+transcript. Summarize the important points of this part in points within {words} words:  
+"""
+
+merge_prompt = """
+You are a YouTube video summarizer. You will be given summaries of consecutive parts
+of one video. Merge them into a single summary of the entire video in points
+within 250 words. Here are the part summaries:  
+"""
+
 # Function to extract YouTube video ID from URL
+# Handles youtu.be/ID, youtube.com/watch?v=ID, /embed/ID and /shorts/ID
+_YT_ID_RE = re.compile(r'(?:youtu\.be/|youtube\.com/(?:watch\?(?:.*&)?v=|embed/|shorts/))([A-Za-z0-9_-]{11})')
+
 def extract_video_id(url):
-    try:
-        parsed_url = urlparse(url)
-        
-        # Handle different YouTube URL formats
-        if 'youtu.be' in parsed_url.netloc:
-            # Short format: https://youtu.be/VIDEO_ID
-            video_id = parsed_url.path[1:]  # Remove the leading '/'
-            return video_id if video_id else None
-        elif 'youtube.com' in parsed_url.netloc or 'www.youtube.com' in parsed_url.netloc:
-            # Long format: https://www.youtube.com/watch?v=VIDEO_ID
-            video_id = parse_qs(parsed_url.query).get("v")
-            return video_id[0] if video_id else None
-        else:
-            return None
-    except Exception:
-        return None
+    m = _YT_ID_RE.search(url)
+    return m.group(1) if m else None
 
 # Alternative function using yt-dlp to actually extract transcript
 def extract_transcript_with_ytdlp(video_url):
     try:
-        import tempfile
-        import os
-        
         # Create a temporary directory
         with tempfile.TemporaryDirectory() as temp_dir:
             ydl_opts = {
@@ -63,142 +153,483 @@ def extract_transcript_with_ytdlp(video_url):
                 'outtmpl': os.path.join(temp_dir, '%(title)s.%(ext)s'),
             }
             
+            # A single extract_info(download=True) call writes the subtitles; skip_download
+            # keeps the media itself from being fetched
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(video_url, download=False)
-                
-                # Check available subtitles
-                subtitles = info.get('subtitles', {})
-                automatic_captions = info.get('automatic_captions', {})
+                info = ydl.extract_info(video_url, download=True)
                 
-                # Try to download subtitles
-                if 'en' in subtitles:
-                    st.write("Found manual English subtitles, downloading...")
-                    ydl.download([video_url])
-                    
-                    # Look for the downloaded subtitle file
-                    for file in os.listdir(temp_dir):
-                        if file.endswith('.en.vtt'):
-                            vtt_file = os.path.join(temp_dir, file)
-                            st.write(f"Found VTT file: {file}")
-                            return extract_text_from_vtt(vtt_file)
-                    
-                    st.write("VTT file not found after download")
-                    return "VTT file not found"
-                            
-                elif 'en' in automatic_captions:
-                    st.write("Found auto-generated English captions, downloading...")
-                    ydl.download([video_url])
-                    
-                    # Look for the downloaded subtitle file
-                    for file in os.listdir(temp_dir):
-                        if file.endswith('.en.vtt'):
-                            vtt_file = os.path.join(temp_dir, file)
-                            st.write(f"Found VTT file: {file}")
-                            return extract_text_from_vtt(vtt_file)
-                    
-                    st.write("VTT file not found after download")
-                    return "VTT file not found"
-                
-                return "No English subtitles found"
+                # yt-dlp records where it wrote each subtitle; fall back to the path next
+                # to the (skipped) media file name for entries without one
+                subtitle = (info.get('requested_subtitles') or {}).get('en') or {}
+                vtt_file = subtitle.get('filepath') or os.path.splitext(ydl.prepare_filename(info))[0] + '.en.vtt'
+            
+            if os.path.exists(vtt_file):
+                return extract_text_from_vtt(vtt_file)
+            
+            return "No English subtitles found"
                 
     except Exception as e:
         return f"yt-dlp error: {str(e)}"
 
 def extract_text_from_vtt(vtt_file):
     try:
-        import re
+        # Stream the file line by line so the raw VTT is never fully resident;
+        # only the first few hundred characters are kept for error reporting
+        # Kept lines go straight into a StringIO instead of a list that is joined later
+        buf = io.StringIO()
+        head_buf = ''
+        in_header = True  # WEBVTT, Kind:, Language: ... up to the first cue timing
+        pending = None  # digit-only line, a cue number only if a timing line follows
         with open(vtt_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        st.write(f"Debug: VTT file content preview: {content[:200]}...")
-        
-        # Remove VTT formatting and extract text
-        # Remove timestamps and formatting
-        text = re.sub(r'\d{2}:\d{2}:\d{2}\.\d{3} --> \d{2}:\d{2}:\d{2}\.\d{3}', '', content)
-        text = re.sub(r'<[^>]+>', '', text)  # Remove HTML tags
-        text = re.sub(r'WEBVTT\n\n', '', text)  # Remove VTT header
-        text = re.sub(r'\n+', ' ', text)  # Replace multiple newlines with space
-        text = re.sub(r'^\d+\n', '', text, flags=re.MULTILINE)  # Remove line numbers
-        
-        # Clean up extra whitespace
-        text = re.sub(r'\s+', ' ', text)  # Replace multiple spaces with single space
-        text = text.strip()
-        
-        st.write(f"Debug: Extracted text length: {len(text)} characters")
+            for line in f:
+                if len(head_buf) < 500:
+                    head_buf += line
+                line = line.strip()
+                if pending is not None:
+                    if '-->' not in line:
+                        buf.write(pending)
+                        buf.write(' ')
+                    pending = None
+                if '-->' in line:
+                    in_header = False
+                    continue
+                if not line or in_header:
+                    continue
+                if line.isdigit():
+                    pending = line
+                    continue
+                line = _VTT_TAG_RE.sub('', line).strip()
+                if line:
+                    buf.write(line)
+                    buf.write(' ')
+            if pending is not None:
+                buf.write(pending)
+        text = buf.getvalue().rstrip()
         
         if len(text) < 10:
-            return f"Error: Extracted text too short. VTT content: {content[:500]}"
+            return f"Error: Extracted text too short. VTT content: {head_buf[:500]}"
         
         return text
         
     except Exception as e:
         return f"Error reading VTT file: {str(e)}"
 
+def _is_valid_transcript(result):
+    return len(result) > 100 and not result.startswith(("Error", "No", "yt-dlp error", "VTT"))
+
+# yt-dlp backend, run in a worker thread since the library is blocking
+async def _try_ytdlp(video_url):
+    result = await _run_blocking(_ytdlp_pool(), extract_transcript_with_ytdlp, video_url)
+    if not _is_valid_transcript(result):
+        raise RuntimeError(result)
+    return result
+
+# youtube-transcript-api backend, run in a worker thread since the library is blocking
+def _fetch_with_api(video_id):
+    transcript_list = YouTubeTranscriptApi().list(video_id)
+    transcript = transcript_list.find_transcript(['en'])
+    transcript_data = transcript.fetch()
+    return " ".join(map(attrgetter("text"), transcript_data))
+
+async def _try_api(video_id):
+    return await _run_blocking(_api_pool(), _fetch_with_api, video_id)
+
+# Race both backends and return (source, transcript) from whichever finishes first
+# with English captions; the other task is cancelled. Raises the api error if both fail.
+async def _race_transcript_backends(video_id):
+    video_url = f"https://www.youtube.com/watch?v={video_id}"
+    tasks = {
+        asyncio.create_task(_try_ytdlp(video_url)): "yt-dlp",
+        asyncio.create_task(_try_api(video_id)): "youtube-transcript-api",
+    }
+    errors = {}
+    pending = set(tasks)
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task.exception() is None:
+                for loser in pending:
+                    loser.cancel()
+                return tasks[task], task.result()
+            errors[tasks[task]] = task.exception()
+    
+    ytdlp_error = errors["yt-dlp"]
+    api_error = errors["youtube-transcript-api"]
+    if isinstance(api_error, (VideoUnavailable, TranscriptsDisabled)):
+        raise api_error
+    raise RuntimeError(f"Both methods failed. yt-dlp result: {ytdlp_error}; "
+                       f"youtube-transcript-api: {api_error}")
+
+# On-disk transcript cache, survives Streamlit restarts
+_CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')), 'yt-summarizer')
+_CACHE_MAX_AGE = 30 * 24 * 3600  # seconds
+_SAFE_ID_RE = re.compile(r'[A-Za-z0-9_-]+')
+
+def _transcript_cache_path(video_id):
+    # Only plain YouTube ids are used as file names
+    if not _SAFE_ID_RE.fullmatch(video_id):
+        return None
+    return os.path.join(_CACHE_DIR, f"{video_id}.txt")
+
+def _get_cached_transcript(video_id):
+    path = _transcript_cache_path(video_id)
+    try:
+        if path and os.path.exists(path) and time.time() - os.path.getmtime(path) < _CACHE_MAX_AGE:
+            with open(path, 'r', encoding='utf-8') as f:
+                return f.read()
+    except OSError:
+        pass
+    return None
+
+def _store_cached_transcript(video_id, transcript_text):
+    path = _transcript_cache_path(video_id)
+    if not path:
+        return
+    try:
+        os.makedirs(_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(transcript_text)
+        os.replace(tmp_path, path)  # atomic, readers never see a partial file
+    except OSError:
+        pass
+
+# Transcripts are cached per video_id. Failures raise, so they are never cached.
+@st.cache_data(ttl=3600, max_entries=128, show_spinner=False)
+def _fetch_transcript(video_id, use_disk_cache=True):
+    if use_disk_cache:
+        cached = _get_cached_transcript(video_id)
+        if cached:
+            return "local cache", cached
+    source, transcript_text = asyncio.run(_race_transcript_backends(video_id))
+    if use_disk_cache:
+        _store_cached_transcript(video_id, transcript_text)
+    return source, transcript_text
+
 # Function to fetch transcript text
-def extract_transcript_details(video_id):
+def extract_transcript_details(video_id, use_disk_cache=True):
     try:
-        # Use yt-dlp as primary method since youtube-transcript-api has issues
-        video_url = f"https://www.youtube.com/watch?v={video_id}"
-        st.write("Using yt-dlp to extract transcript...")
-        
-        result = extract_transcript_with_ytdlp(video_url)
-        
-        # Check if yt-dlp succeeded (has actual transcript text)
-        if len(result) > 100 and not result.startswith("Error") and not result.startswith("No"):
-            st.write("✅ Successfully extracted transcript with yt-dlp!")
-            return result
-        else:
-            # Fallback to youtube-transcript-api if yt-dlp fails
-            st.write("yt-dlp failed, trying youtube-transcript-api...")
-            try:
-                transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
-                transcript = transcript_list.find_transcript(['en'])
-                transcript_data = transcript.fetch()
-                transcript_text = " ".join([i["text"] for i in transcript_data])
-                st.write("Success with youtube-transcript-api!")
-                return transcript_text
-            except Exception as api_error:
-                st.write(f"youtube-transcript-api also failed: {str(api_error)}")
-                return f"Both methods failed. yt-dlp result: {result}"
+        label = "Fetching transcript with yt-dlp and youtube-transcript-api"
+        with st.status(f"{label}...") as status:
+            future = _submit_pipeline(_fetch_transcript, video_id, use_disk_cache)
+            started = time.monotonic()
+            # wait() returns as soon as the future finishes, so cache hits add no delay
+            while not wait([future], timeout=0.25).done:
+                status.update(label=f"{label}... {time.monotonic() - started:.0f}s")
+            source, transcript_text = future.result()
+            status.update(label=f"✅ Successfully extracted transcript with {source}!", state="complete")
+        return transcript_text
         
-    except VideoUnavailable:
+    except Exception as e:
+        return transcript_error_message(e)
+
+def transcript_error_message(error):
+    if isinstance(error, VideoUnavailable):
         return "Error: The video is unavailable or private."
-    except TranscriptsDisabled:
+    if isinstance(error, TranscriptsDisabled):
         return "Error: Transcripts are disabled for this video."
-    except Exception as e:
-        return f"Error: {str(e)}"
+    return f"Error: {str(error)}"
+
+# Process-wide cap on in-flight Gemini calls, shared by every session, chunk and batch
+# worker. A threading semaphore since the calls run in threads, each under its own loop.
+@st.cache_resource
+def _gemini_slots():
+    return threading.BoundedSemaphore(_MAX_CONCURRENCY)
+
+# Back off and retry on Gemini 429s rather than failing the whole summary
+_retry_on_429 = retry(retry=retry_if_exception_type(ResourceExhausted), wait=wait_exponential(multiplier=1, max=16),
+                      stop=stop_after_attempt(5), reraise=True)
+
+# Both helpers take the _gemini_slots() semaphore as an argument: it is looked up on
+# the calling thread, since the chunk workers have no ScriptRunContext for st caches.
+# The slot is taken inside the retried call, so no slot is held during a backoff.
+@_retry_on_429
+def _generate_with_retry(model, text, slots):
+    with slots:
+        return model.generate_content(text, generation_config=_GENERATION_CONFIG).text
+
+# The streaming call surfaces a 429 when it is started, so the opening call is retried.
+# On success the slot stays taken; the caller releases it once the stream is read.
+@_retry_on_429
+def _start_stream_with_retry(model, text, slots):
+    slots.acquire()
+    try:
+        return model.generate_content(text, stream=True, generation_config=_GENERATION_CONFIG)
+    except BaseException:
+        slots.release()
+        raise
+
+# Summarize every chunk concurrently, at most max_concurrency of this request's calls
+# at a time (on top of the process-wide _gemini_slots cap). The fan-out semaphore is
+# created per call since asyncio primitives bind to one event loop.
+# The sync client is run in threads: the SDK's async client binds to the first event
+# loop it sees and breaks on the fresh loop each asyncio.run() creates.
+# on_progress(done, total), if given, is called on the loop's thread as chunks finish.
+async def _summarize_chunks(model, chunks, max_concurrency=_MAX_CONCURRENCY, on_progress=None):
+    sem = asyncio.Semaphore(max_concurrency)
+    slots = _gemini_slots()
+    chunk_text = chunk_prompt.format(words=max(_SUMMARY_WORDS // len(chunks), 40))
+    done = 0
+    
+    async def summarize(chunk):
+        nonlocal done
+        async with sem:
+            part = await asyncio.to_thread(_generate_with_retry, model, chunk_text + chunk, slots)
+        done += 1
+        if on_progress:
+            on_progress(done, len(chunks))
+        return part
+    
+    return await asyncio.gather(*[summarize(c) for c in chunks])
+
+# Function to get summary using Gemini, yields the response text as it streams in
+def generate_gemini_content(transcript_text, prompt, max_concurrency=_MAX_CONCURRENCY, on_progress=None):
+    model = _gemini_model(api_key)
+    chunks = textwrap.wrap(transcript_text, _CHUNK_CHARS, break_long_words=False, break_on_hyphens=False)
+    if len(chunks) > 1:
+        parts = asyncio.run(_summarize_chunks(model, chunks, max_concurrency, on_progress))
+        prompt, transcript_text = merge_prompt, "\n\n".join(parts)
+    
+    # The single-shot / merge call holds a slot only while its stream is being read
+    slots = _gemini_slots()
+    response = _start_stream_with_retry(model, prompt + transcript_text, slots)
+    try:
+        for chunk in response:
+            yield chunk.text
+    finally:
+        slots.release()
+
+def transcript_digest(transcript_text):
+    return hashlib.blake2b(transcript_text.encode(), digest_size=16).hexdigest()
+
+# Finished summaries, keyed on (video_id, transcript digest, prompt) and shared across
+# sessions. A plain LRU dict rather than st.cache_data, which cannot cache a stream.
+_SUMMARY_CACHE_SIZE = 128
+
+@st.cache_resource
+def _summary_cache():
+    # Shared by every session and by batch worker threads, so all access takes the lock
+    return {"entries": OrderedDict(), "lock": threading.Lock()}
+
+def get_cached_summary(key):
+    cache = _summary_cache()
+    with cache["lock"]:
+        summary = cache["entries"].get(key)
+        if summary is not None:
+            cache["entries"].move_to_end(key)
+    return summary
 
-# Function to get summary using Gemini
-def generate_gemini_content(transcript_text, prompt):
-    model = genai.GenerativeModel("gemini-2.0-flash-001")
-    response = model.generate_content(prompt + transcript_text)
-    return response.text
+def store_summary(key, summary):
+    cache = _summary_cache()
+    with cache["lock"]:
+        entries = cache["entries"]
+        entries[key] = summary
+        entries.move_to_end(key)
+        while len(entries) > _SUMMARY_CACHE_SIZE:
+            entries.popitem(last=False)
+
+# Semantic summary cache: re-uploads, mirrors and clips produce near-identical
+# transcripts, so a summary is reused when a new transcript embeds within
+# the cosine threshold of a cached one. Persisted next to the transcript cache;
+# entries are stored int8-quantized once _SEMANTIC_TRAIN_SIZE of them exist.
+_SEMANTIC_INDEX_PATH = os.path.join(_CACHE_DIR, 'embeddings.faiss')
+_SEMANTIC_SUMMARIES_PATH = os.path.join(_CACHE_DIR, 'embeddings.json')
+_SEMANTIC_DIM = 384
+_SEMANTIC_THRESHOLD = 0.92  # exact FP32 entries
+_SEMANTIC_THRESHOLD_QUANTIZED = 0.90  # looser once int8 quantization noise is involved
+_SEMANTIC_TRAIN_SIZE = 1024  # entries kept in FP32 before switching to an int8 index
+_SEMANTIC_WINDOWS = 8  # the model only reads ~256 tokens, so embed spaced windows
+
+@st.cache_resource(show_spinner=False)
+def _embedding_model():
+    return SentenceTransformer('all-MiniLM-L6-v2')
+
+@st.cache_resource(show_spinner=False)
+def _semantic_cache():
+    index, summaries = None, []
+    try:
+        if os.path.exists(_SEMANTIC_INDEX_PATH) and os.path.exists(_SEMANTIC_SUMMARIES_PATH):
+            index = faiss.read_index(_SEMANTIC_INDEX_PATH)
+            with open(_SEMANTIC_SUMMARIES_PATH, 'r', encoding='utf-8') as f:
+                summaries = json.load(f)
+            if index.ntotal != len(summaries):
+                index, summaries = None, []
+    except (OSError, RuntimeError, ValueError):
+        index, summaries = None, []
+    if index is None:
+        index = faiss.IndexFlatIP(_SEMANTIC_DIM)
+    return {"index": index, "summaries": summaries, "lock": threading.Lock()}
+
+def embed_transcript(transcript_text):
+    # Mean of normalized window embeddings, re-normalized so inner product is cosine
+    step = max(len(transcript_text) // _SEMANTIC_WINDOWS, 1)
+    windows = [transcript_text[i:i + 1000] for i in range(0, len(transcript_text), step)][:_SEMANTIC_WINDOWS]
+    vectors = _embedding_model().encode(windows, normalize_embeddings=True)
+    embedding = vectors.mean(axis=0, keepdims=True).astype(np.float32)
+    return embedding / np.linalg.norm(embedding)
+
+def find_similar_summary(embedding):
+    cache = _semantic_cache()
+    with cache["lock"]:
+        if cache["index"].ntotal == 0:
+            return None
+        scores, ids = cache["index"].search(embedding, 1)
+        quantized = not isinstance(cache["index"], faiss.IndexFlat)
+    threshold = _SEMANTIC_THRESHOLD_QUANTIZED if quantized else _SEMANTIC_THRESHOLD
+    if scores[0][0] >= threshold:
+        return cache["summaries"][ids[0][0]]
+    return None
+
+# Once enough embeddings exist, train an 8-bit scalar quantizer on them and move the
+# entries over: 4x less memory and disk per entry, and a faster bandwidth-bound scan
+def _quantize_index(index):
+    vectors = index.reconstruct_n(0, index.ntotal)
+    quantized = faiss.IndexScalarQuantizer(_SEMANTIC_DIM, faiss.ScalarQuantizer.QT_8bit,
+                                           faiss.METRIC_INNER_PRODUCT)
+    quantized.train(vectors)
+    quantized.add(vectors)
+    return quantized
+
+def add_similar_summary(embedding, summary):
+    cache = _semantic_cache()
+    with cache["lock"]:
+        cache["index"].add(embedding)
+        if isinstance(cache["index"], faiss.IndexFlat) and cache["index"].ntotal >= _SEMANTIC_TRAIN_SIZE:
+            cache["index"] = _quantize_index(cache["index"])
+        cache["summaries"].append(summary)
+        try:
+            os.makedirs(_CACHE_DIR, exist_ok=True)
+            faiss.write_index(cache["index"], _SEMANTIC_INDEX_PATH + '.tmp')
+            with open(_SEMANTIC_SUMMARIES_PATH + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(cache["summaries"], f)
+            os.replace(_SEMANTIC_INDEX_PATH + '.tmp', _SEMANTIC_INDEX_PATH)
+            os.replace(_SEMANTIC_SUMMARIES_PATH + '.tmp', _SEMANTIC_SUMMARIES_PATH)
+        except (OSError, RuntimeError):
+            pass
+
+# Batch mode: fetch every transcript concurrently, then summarize them concurrently
+# with at most max_concurrency videos in flight. Each video summarizes its own chunks
+# one at a time, so this request never has more than max_concurrency Gemini calls
+# in flight. Returns one summary or "Error: ..." string per video id. Worker threads
+# get the script context so st caches work there.
+async def _summarize_batch(video_ids, use_disk_cache, max_concurrency):
+    ctx = get_script_run_ctx()
+    sem = asyncio.Semaphore(max_concurrency)
+    
+    def fetch(video_id):
+        add_script_run_ctx(threading.current_thread(), ctx)
+        try:
+            return _fetch_transcript(video_id, use_disk_cache)[1]
+        except Exception as e:
+            return transcript_error_message(e)
+    
+    def summarize(video_id, transcript_text):
+        add_script_run_ctx(threading.current_thread(), ctx)
+        cache_key = (video_id, transcript_digest(transcript_text), prompt)
+        summary = get_cached_summary(cache_key)
+        if summary is None:
+            summary = "".join(generate_gemini_content(transcript_text, prompt, 1))
+            store_summary(cache_key, summary)
+        return summary
+    
+    async def summarize_limited(video_id, transcript_text):
+        if transcript_text.startswith("Error:"):
+            return transcript_text
+        async with sem:
+            try:
+                return await asyncio.to_thread(summarize, video_id, transcript_text)
+            except Exception as e:
+                return f"Error: {str(e)}"
+    
+    transcripts = await asyncio.gather(*[asyncio.to_thread(fetch, v) for v in video_ids])
+    return await asyncio.gather(*[summarize_limited(v, t) for v, t in zip(video_ids, transcripts)])
+
+# The browser loads the thumbnail itself, in parallel with the transcript fetch,
+# and caches it; the server never downloads the image
+def thumbnail_url(video_id):
+    return f"https://img.youtube.com/vi/{video_id}/0.jpg"
 
 # Streamlit app UI
+st.sidebar.header("⚙️ Settings")
+max_concurrency = st.sidebar.slider("Parallel Gemini calls", min_value=1, max_value=max(_MAX_CONCURRENCY, 2),
+                                    value=_MAX_CONCURRENCY,
+                                    help="Concurrent Gemini calls for this request; the app-wide cap is GEMINI_MAX_CONCURRENCY")
+use_local_cache = st.sidebar.toggle("Use local cache", value=True, help="Keep downloaded transcripts on disk so repeat videos skip YouTube")
+use_semantic_cache = st.sidebar.toggle("Reuse summaries of similar videos", value=SEMANTIC_CACHE_AVAILABLE,
+                                       disabled=not SEMANTIC_CACHE_AVAILABLE,
+                                       help="Needs sentence-transformers and faiss-cpu installed")
+
 st.title("🎥 YouTube Video Summarizer")
 
-youtube_link = st.text_input("Enter YouTube Video Link:")
+# A form only reruns the script on submit, not on every edit of the links
+with st.form("yt_form"):
+    youtube_links = st.text_area("Enter YouTube Video Link(s), one per line:")
+    submitted = st.form_submit_button("Get Detailed Notes")
 
-if youtube_link:
-    video_id = extract_video_id(youtube_link)
-    if video_id:
-        st.image(f"http://img.youtube.com/vi/{video_id}/0.jpg", width='stretch')
-    else:
-        st.error("❌ Invalid YouTube URL. Please check and try again.")
+links = [link.strip() for link in youtube_links.splitlines() if link.strip()]
 
-if st.button("Get Detailed Notes"):
-    video_id = extract_video_id(youtube_link)
+if submitted and len(links) > 1:
+    video_ids = []
+    for link in links:
+        video_id = extract_video_id(link)
+        if not video_id:
+            st.error(f"❌ Invalid YouTube URL: {link}")
+        elif video_id not in video_ids:  # the same video pasted twice is summarized once
+            video_ids.append(video_id)
+    
+    if video_ids:
+        with st.spinner(f"Summarizing {len(video_ids)} videos..."):
+            summaries = asyncio.run(_summarize_batch(video_ids, use_local_cache, max_concurrency))
+        for video_id, summary in zip(video_ids, summaries):
+            st.markdown(f"## 📝 Detailed Notes: {video_id}")
+            st.image(thumbnail_url(video_id), width='stretch')
+            if summary.startswith("Error:"):
+                st.error(summary)
+            else:
+                st.markdown(summary)
+
+elif submitted:
+    video_id = extract_video_id(links[0]) if links else None
     if not video_id:
-        st.error("❌ Invalid YouTube link format.")
+        st.error("❌ Invalid YouTube URL. Please check and try again.")
     else:
-        transcript_text = extract_transcript_details(video_id)
+        st.image(thumbnail_url(video_id), width='stretch')
+
+        transcript_text = extract_transcript_details(video_id, use_local_cache)
 
         if transcript_text.startswith("Error:"):
             st.error(transcript_text)
         else:
-            summary = generate_gemini_content(transcript_text, prompt)
             st.markdown("## 📝 Detailed Notes:")
-            st.write(summary)
+            cache_key = (video_id, transcript_digest(transcript_text), prompt)
+            summary = get_cached_summary(cache_key)
+            embedding = None
+            if summary is None and use_semantic_cache:
+                # The first use also downloads and loads the embedding model
+                with st.spinner("Checking for summaries of similar videos..."):
+                    embedding = embed_transcript(transcript_text)
+                    summary = find_similar_summary(embedding)
+                if summary is not None:
+                    st.caption("Reusing the summary of a near-identical transcript.")
+                    store_summary(cache_key, summary)
+            if summary is None:
+                # Render tokens as they arrive instead of waiting for the full response
+                placeholder = st.empty()
+                summary = ""
+                
+                # Long videos are summarized chunk by chunk first; show that progress
+                # in the placeholder until the merged summary starts streaming
+                def report_chunks(done, total):
+                    placeholder.caption(f"Summarizing chunk {done}/{total}...")
+                
+                for token in generate_gemini_content(transcript_text, prompt, max_concurrency, report_chunks):
+                    summary += token
+                    placeholder.markdown(summary)
+                store_summary(cache_key, summary)
+                if embedding is not None:
+                    add_similar_summary(embedding, summary)
+            else:
+                st.markdown(summary)
 # developer credit
 st.markdown("---")
 st.markdown(